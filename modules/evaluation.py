@@ -7,18 +7,27 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 def run_baselines(prices: pd.DataFrame, returns: pd.DataFrame, cfg: Dict[str, Any]) -> Dict[str, Any]:
     """
     Baselines simples para referencia:
     - Buy&Hold del activo/benchmark (por ticker)
     """
-    models = {}
-
-    # Buy&Hold: curve = precio normalizado
-    for col in prices.columns:
-        curve = (prices[col] / prices[col].iloc[0]).rename(f"BuyHold_{col}")
-        models[f"BuyHold_{col}"] = {"curve": curve, "description": f"Buy&Hold sobre {col}."}
+    # Buy&Hold: curve = precio normalizado. Una sola división broadcast
+    # normaliza todos los activos a la vez (vs una op pandas por columna).
+    normed = prices.div(prices.iloc[0], axis=1)
+    models = {
+        f"BuyHold_{col}": {
+            "curve": normed[col].rename(f"BuyHold_{col}"),
+            "description": f"Buy&Hold sobre {col}."
+        }
+        for col in normed.columns
+    }
 
     return {"status": "ok", "models": models, "notes": ["Baseline Buy&Hold por activo."]}
 
@@ -31,46 +40,116 @@ def _annualize_vol(daily_std: float, trading_days: int) -> float:
     return daily_std * np.sqrt(trading_days)
 
 
-def _max_drawdown(curve: pd.Series) -> float:
-    peak = curve.cummax()
-    dd = curve / peak - 1.0
-    return float(dd.min())
+def _max_drawdown_scan(arr: np.ndarray) -> float:
+    # Un solo scan que lleva el máximo corriente y el peor drawdown,
+    # en vez de tres pasadas (cummax, ratio, min).
+    peak = arr[0]
+    mdd = 0.0
+    for i in range(arr.size):
+        if arr[i] > peak:
+            peak = arr[i]
+        dd = arr[i] / peak - 1.0
+        if dd < mdd:
+            mdd = dd
+    return mdd
 
 
-def evaluate_portfolio_curves(models: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
-    td = int(cfg["evaluation"]["trading_days"])
-    rf = float(cfg["evaluation"]["risk_free_annual"])
+if njit is not None:
+    _max_drawdown_scan = njit(cache=True, fastmath=True)(_max_drawdown_scan)
 
-    out = {}
 
-    for name, payload in models.items():
-        curve: pd.Series = payload["curve"].dropna().copy()
-        # Convertir a curva de valor (si parte distinta de 1)
-        if curve.iloc[0] != 1.0:
-            curve = curve / float(curve.iloc[0])
+def _dedup_index(curve: pd.Series) -> pd.Series:
+    # Guarda contra etiquetas repetidas (p.ej. la curva PPO ancla su base
+    # 1.0 en la primera fecha de features): concatenar una serie con índice
+    # duplicado contra otros índices levanta InvalidIndexError.
+    if curve.index.has_duplicates:
+        return curve[~curve.index.duplicated(keep="first")]
+    return curve
 
-        rets = curve.pct_change().fillna(0.0)
-        mu = float(rets.mean())
-        sigma = float(rets.std(ddof=0))
 
-        ann_ret = _annualize_return(mu, td)
-        ann_vol = _annualize_vol(sigma, td)
+def evaluate_portfolio_curves(
+    models: Dict[str, Any],
+    cfg: Dict[str, Any]
+) -> tuple[Dict[str, Dict[str, float]], pd.DataFrame]:
+    """
+    Retorna (metrics, curves_df) donde curves_df es la matriz (T, M) de
+    curvas ya normalizadas (base=1.0). Los consumidores downstream
+    (plot, reporte) reutilizan curves_df en vez de re-normalizar.
+
+    Las curvas pueden tener soportes distintos (PPO arranca después del
+    dropna de ventanas de features): cada columna se normaliza por SU
+    primer valor válido y sus métricas se reducen solo sobre su soporte.
+    """
+    td = int(cfg["evaluation"]["trading_days"])
+    rf = float(cfg["evaluation"]["risk_free_annual"])
+
+    out = {}
+    if not models:
+        return out, pd.DataFrame()
+
+    # Apilar todas las curvas en una matriz (T, M) y computar las métricas
+    # como reducciones sobre el frame completo (una pasada C por métrica,
+    # en vez de M round-trips pandas modelo por modelo).
+    curves = pd.concat(
+        {n: _dedup_index(p["curve"].dropna()) for n, p in models.items()},
+        axis=1
+    ).ffill()
+    curves = curves.dropna(axis=1, how="all")
+    if curves.shape[1] == 0:
+        return out, pd.DataFrame()
+
+    # Convertir a curvas de valor (base = 1.0). La base es el primer valor
+    # VÁLIDO por columna: tras el outer join las curvas cortas quedan con
+    # NaN iniciales que ffill no rellena, y dividir por iloc[0] global
+    # volvería NaN la columna completa.
+    curves = curves / curves.bfill().iloc[0]
+
+    # Retornos vía ratio numpy directo: una división vectorizada sobre el
+    # buffer crudo, sin el intermedio ni la semántica NA de pct_change.
+    # Los NaN iniciales propagan NaN y las reducciones nan* los excluyen,
+    # así cada columna promedia solo sobre su propio soporte.
+    v = curves.to_numpy()
+    first = np.isnan(v).argmin(axis=0)  # primera fila válida por columna
+    rets = np.full_like(v, np.nan)
+    np.divide(v[1:], v[:-1], out=rets[1:])
+    rets[1:] -= 1.0
+    rets[first, np.arange(v.shape[1])] = 0.0  # retorno 0 en la base
+
+    mu = np.nanmean(rets, axis=0)
+    sigma = np.nanstd(rets, axis=0, ddof=0)
+
+    if njit is not None:
+        # Scan compilado de una pasada por columna (sobre su soporte
+        # válido), en vez de las tres pasadas cummax/ratio/min.
+        mdd = np.array([
+            _max_drawdown_scan(v[first[j]:, j]) for j in range(v.shape[1])
+        ])
+    else:
+        # Sin numba el scan escalar sería más lento que pandas: fallback
+        # vectorizado (cummax/min saltan los NaN iniciales).
+        peak = curves.cummax()
+        mdd = (curves / peak - 1.0).min().to_numpy()
+
+    for j, name in enumerate(curves.columns):
+        ann_ret = _annualize_return(float(mu[j]), td)
+        ann_vol = _annualize_vol(float(sigma[j]), td)
         sharpe = (ann_ret - rf) / (ann_vol + 1e-12)
 
-        mdd = _max_drawdown(curve)
-        calmar = ann_ret / abs(mdd) if mdd < 0 else np.nan
+        mdd_n = float(mdd[j])
+        calmar = ann_ret / abs(mdd_n) if mdd_n < 0 else np.nan
 
+        final = float(curves[name].iloc[-1])
         out[name] = {
-            "total_return": float(curve.iloc[-1] - 1.0),
+            "total_return": final - 1.0,
             "CAGR_approx": float(ann_ret),
             "ann_vol": float(ann_vol),
             "sharpe": float(sharpe),
-            "max_drawdown": float(mdd),
+            "max_drawdown": mdd_n,
             "calmar": float(calmar),
-            "final_curve": float(curve.iloc[-1]),
+            "final_curve": final,
         }
 
-    return out
+    return out, curves
 
 
 def compare_models_table(metrics: Dict[str, Dict[str, float]]) -> pd.DataFrame:
@@ -79,21 +158,21 @@ def compare_models_table(metrics: Dict[str, Dict[str, float]]) -> pd.DataFrame:
     return df.sort_values("sharpe", ascending=False)
 
 
-def plot_equity_curves(models: Dict[str, Any], cfg: Dict[str, Any]) -> str:
+def plot_equity_curves(curves_df: pd.DataFrame, cfg: Dict[str, Any]) -> str:
+    # Recibe la matriz de curvas ya normalizadas de evaluate_portfolio_curves
+    # (no re-normaliza: esa pasada ya se hizo una vez).
     figs_dir = cfg["data"]["figures_dir"]
-    plt.figure(figsize=(12, 5))
-    for name, payload in models.items():
-        curve = payload["curve"].dropna().copy()
-        if curve.iloc[0] != 1.0:
-            curve = curve / float(curve.iloc[0])
-        plt.plot(curve.index, curve.values, label=name)
+    fig, ax = plt.subplots(figsize=(12, 5))
+    # Una sola llamada plot con la matriz 2D: un setup de Artist/transform
+    # en vez de M. rasterized acota el costo de encode PNG con muchas curvas.
+    lines = ax.plot(curves_df.index, curves_df.values, rasterized=True)
 
-    plt.title("Curvas de valor normalizadas (INR)")
-    plt.xlabel("Fecha"); plt.ylabel("Valor (base=1.0)")
-    plt.grid(True); plt.legend()
+    ax.set_title("Curvas de valor normalizadas (INR)")
+    ax.set_xlabel("Fecha"); ax.set_ylabel("Valor (base=1.0)")
+    ax.grid(True); ax.legend(lines, list(curves_df.columns))
 
     path = os.path.join(figs_dir, "eval_equity_curves.png")
-    plt.tight_layout(); plt.savefig(path, dpi=140); plt.close()
+    fig.tight_layout(); fig.savefig(path, dpi=140); plt.close(fig)
     return path
 
 
@@ -108,15 +187,13 @@ def build_report_payload(
     baselines: Dict[str, Any],
     rl: Dict[str, Any],
     metrics: Dict[str, Dict[str, float]],
-    comparison_table_path: str
+    comparison_table_path: str,
+    curves_df: pd.DataFrame = None
 ) -> Dict[str, Any]:
-    # Para el reporte: figura resumen de curvas (si hay varios modelos)
-    models = {}
-    models.update(baselines.get("models", {}))
-    models.update(optimization.get("models", {}))
-    models.update(rl.get("models", {}))
-
-    equity_fig = plot_equity_curves(models, cfg) if models else None
+    # Para el reporte: figura resumen de curvas (reutiliza las curvas ya
+    # normalizadas en la evaluación; evita re-mergear y re-normalizar).
+    has_curves = curves_df is not None and len(curves_df.columns) > 0
+    equity_fig = plot_equity_curves(curves_df, cfg) if has_curves else None
 
     # Split temporal (para reportar)
     split = cfg["experimental"]["split"]
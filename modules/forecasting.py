@@ -14,9 +14,13 @@ forward-looking que alimenten el módulo de optimización (MVO) y el reporte.
 
 from __future__ import annotations
 
+import hashlib
+import os
+import pickle
 import warnings
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+import numpy as np
 import pandas as pd
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
@@ -27,19 +31,106 @@ def _fit_sarima(
     series: pd.Series,
     order: tuple[int, int, int],
     seasonal_order: tuple[int, int, int, int],
+    cache_dir: Optional[str] = None,
+    method: str = "lbfgs",
+    maxiter: int = 50,
+    start_params=None,
 ):
     """
     Ajusta un modelo SARIMAX a una serie univariada de retornos.
+
+    Si cache_dir está definido, el fit se cachea en disco (pickle) con clave
+    md5(datos + hiperparámetros): mismos datos + mismo (order, seasonal_order)
+    => se reutiliza el fit previo en vez de repetir la MLE iterativa.
+
+    El fit usa L-BFGS con maxiter acotado (converge bastante más rápido que
+    los fallbacks tipo Nelder-Mead para estos modelos chicos). La serie se
+    pasa como buffer float64 contiguo, reutilizable entre refits si más
+    adelante se agrega grid search de (order, seasonal_order).
     """
+    y = np.ascontiguousarray(series.to_numpy(dtype=np.float64))
+
+    cache_file = None
+    if cache_dir:
+        key = hashlib.md5(
+            y.tobytes() + repr((order, seasonal_order, method, maxiter)).encode("utf-8")
+        ).hexdigest()
+        cache_file = os.path.join(cache_dir, f"sarima_{key}.pkl")
+        if os.path.exists(cache_file):
+            with open(cache_file, "rb") as f:
+                return pickle.load(f)
+
     model = SARIMAX(
-        series,
+        y,
         order=order,
         seasonal_order=seasonal_order,
         trend="c",
         enforce_stationarity=False,
         enforce_invertibility=False,
     )
-    return model.fit(disp=False)
+    model_fit = model.fit(disp=False, method=method, maxiter=maxiter, start_params=start_params)
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "wb") as f:
+            pickle.dump(model_fit, f)
+
+    return model_fit
+
+
+def _forecast_one(
+    ticker: str,
+    rets_m: pd.Series,
+    order: tuple[int, int, int],
+    seasonal_order: tuple[int, int, int, int],
+    horizon: int,
+    cache_dir: Optional[str] = None,
+) -> tuple[str, Any, Dict[str, Any]]:
+    """
+    Ajusta y pronostica UN activo a partir de sus retornos mensuales.
+    Retorna (ticker, mu_hat, diagnostics).
+
+    Función top-level para poder despacharse a workers de joblib (loky).
+    """
+    # Los workers de loky no heredan el filtro de warnings del proceso padre
+    warnings.filterwarnings("ignore")
+
+    # Control mínimo de tamaño de muestra
+    if len(rets_m) < 36:
+        return ticker, None, {
+            "status": "skipped",
+            "reason": "Serie demasiado corta para estimar SARIMA",
+        }
+
+    try:
+        model_fit = _fit_sarima(
+            rets_m,
+            order=order,
+            seasonal_order=seasonal_order,
+            cache_dir=cache_dir,
+        )
+
+        # Forecast (one-step o multi-step)
+        forecast = model_fit.forecast(steps=horizon)
+
+        # Usamos el promedio del horizonte como mu esperado
+        mu_hat = float(forecast.mean())
+
+        return ticker, mu_hat, {
+            "status": "ok",
+            "mu_forecast": mu_hat,
+            "hist_mean": float(rets_m.mean()),
+            "hist_std": float(rets_m.std(ddof=0)),
+            "order": order,
+            "seasonal_order": seasonal_order,
+            "aic": float(model_fit.aic),
+        }
+
+    except Exception as e:
+        return ticker, None, {
+            "status": "error",
+            "error": str(e),
+        }
 
 
 def run_forecasting_sarima(
@@ -78,59 +169,34 @@ def run_forecasting_sarima(
             "notes": ["Módulo de forecasting deshabilitado por configuración."],
         }
 
+    # Fits por activo: independientes y CPU-bound (MLE de statsmodels),
+    # así que se paralelizan con joblib si está disponible.
+    n_jobs = int(fcfg.get("n_jobs", -1))
+    cache_dir = fcfg.get("cache_dir")
+
+    # Remuestreo mensual + retornos para TODOS los activos en una sola
+    # pasada vectorizada (en vez de un resample/pct_change por ticker).
+    px_m_all = prices.resample("MS").last()
+    rets_m_all = px_m_all.pct_change().iloc[1:]
+
+    try:
+        from joblib import Parallel, delayed
+        results = Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_forecast_one)(t, rets_m_all[t].dropna(), order, seasonal_order, horizon, cache_dir)
+            for t in prices.columns
+        )
+    except ImportError:
+        # Fallback secuencial si falta joblib
+        results = [
+            _forecast_one(t, rets_m_all[t].dropna(), order, seasonal_order, horizon, cache_dir)
+            for t in prices.columns
+        ]
+
     forecasts_mu: Dict[str, float] = {}
     diagnostics: Dict[str, Dict[str, Any]] = {}
-
-    # Loop por activo
-    for ticker in prices.columns:
-        px = prices[ticker].copy()
-
-        # Remuestreo mensual (fin de mes)
-        px_m = px.resample("MS").last()
-
-        # Retornos simples mensuales
-        rets_m = px_m.pct_change().dropna()
-
-        # Control mínimo de tamaño de muestra
-        if len(rets_m) < 36:
-            forecasts_mu[ticker] = None
-            diagnostics[ticker] = {
-                "status": "skipped",
-                "reason": "Serie demasiado corta para estimar SARIMA",
-            }
-            continue
-
-        try:
-            model_fit = _fit_sarima(
-                rets_m,
-                order=order,
-                seasonal_order=seasonal_order,
-            )
-
-            # Forecast (one-step o multi-step)
-            forecast = model_fit.forecast(steps=horizon)
-
-            # Usamos el promedio del horizonte como mu esperado
-            mu_hat = float(forecast.mean())
-
-            diagnostics[ticker] = {
-                "status": "ok",
-                "mu_forecast": mu_hat,
-                "hist_mean": float(rets_m.mean()),
-                "hist_std": float(rets_m.std(ddof=0)),
-                "order": order,
-                "seasonal_order": seasonal_order,
-                "aic": float(model_fit.aic),
-            }
-
-            forecasts_mu[ticker] = mu_hat
-
-        except Exception as e:
-            forecasts_mu[ticker] = None
-            diagnostics[ticker] = {
-                "status": "error",
-                "error": str(e),
-            }
+    for ticker, mu_hat, diag in results:
+        forecasts_mu[ticker] = mu_hat
+        diagnostics[ticker] = diag
 
     # Salida estandarizada para el pipeline y el reporte
     return {
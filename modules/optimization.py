@@ -14,34 +14,26 @@ Salida:
 
 from __future__ import annotations
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 
 import numpy as np
 import pandas as pd
 
 
-def _safe_float(x) -> Optional[float]:
-    try:
-        if x is None:
-            return None
-        v = float(x)
-        if np.isfinite(v):
-            return v
-        return None
-    except Exception:
-        return None
-
-
 def _make_mu_vector(
     returns: pd.DataFrame,
     forecast_outputs: Dict[str, Any],
     cfg: Dict[str, Any],
+    returns_stats: Dict[str, pd.Series] = None,
 ) -> pd.Series:
     """
     Construye vector mu (retornos esperados anualizados) de forma robusta.
     - Si forecasting entrega mu por ticker, lo usa.
     - Si falta mu para un ticker, usa media histórica.
     - Permite mezclar (híbrido) forecast + histórico.
+
+    returns_stats permite reutilizar la media por columna ya computada por
+    el orquestador ("mean_col") en vez de volver a pasar sobre la matriz.
     """
     ocfg = cfg.get("optimization", {})
     mix = ocfg.get("mu_mix", {"forecast_weight": 0.5, "historical_weight": 0.5})
@@ -56,7 +48,12 @@ def _make_mu_vector(
     trading_days = int(cfg.get("evaluation", {}).get("trading_days", 252))
 
     # Media histórica diaria -> anualizada aproximada
-    hist_mu_annual = (1.0 + returns.mean()) ** trading_days - 1.0
+    mean_col = (returns_stats or {}).get("mean_col")
+    if mean_col is None:
+        mean_col = returns.mean()
+    else:
+        mean_col = mean_col.reindex(returns.columns)
+    hist_mu_annual = (1.0 + mean_col) ** trading_days - 1.0
 
     # Forecast mu: normalmente mensual; convertimos a anual aprox si corresponde
     # Si forecasting entrega mu mensual: anual ~ (1+mu_m)^12 - 1
@@ -64,19 +61,19 @@ def _make_mu_vector(
     forecast_is_monthly = bool(fcfg.get("forecast_is_monthly", True))  # default: mensual
     forecasts = forecast_outputs.get("forecasts_mu", {}) if isinstance(forecast_outputs, dict) else {}
 
-    mu_forecast_annual = pd.Series(index=returns.columns, dtype=float)
-    for c in returns.columns:
-        v = _safe_float(forecasts.get(c))
-        if v is None:
-            mu_forecast_annual.loc[c] = np.nan
-        else:
-            if forecast_is_monthly:
-                mu_forecast_annual.loc[c] = (1.0 + v) ** 12 - 1.0
-            else:
-                mu_forecast_annual.loc[c] = (1.0 + v) ** trading_days - 1.0
+    # Vector mu de forecast en una sola op vectorizada: coerción numérica
+    # (None/str -> NaN), reindex a los activos y anualización por ufunc.
+    # No reintroducir asignaciones escalares .loc[c] aquí: cada una paga
+    # hashing de índice + chequeo de dtype por llamada.
+    mu_f = pd.to_numeric(pd.Series(forecasts, dtype=object), errors="coerce")
+    mu_f = mu_f.reindex(returns.columns).astype(float)
+    mu_f = mu_f.where(np.isfinite(mu_f))
+
+    exp = 12 if forecast_is_monthly else trading_days
+    mu_forecast_annual = (1.0 + mu_f) ** exp - 1.0
 
     # Híbrido con fallback: si forecast NaN -> usar histórico
-    mu = wf * mu_forecast_annual + wh * hist_mu_annual
+    mu = wf * mu_forecast_annual.fillna(hist_mu_annual) + wh * hist_mu_annual
     mu = mu.where(np.isfinite(mu), hist_mu_annual)  # reemplaza NaN/Inf por histórico
 
     # Clip opcional para evitar extremos (importante para estabilidad numérica)
@@ -87,13 +84,67 @@ def _make_mu_vector(
     return mu
 
 
+def _ledoit_wolf_cov_xp(values: np.ndarray, xp) -> np.ndarray:
+    """
+    Shrinkage Ledoit-Wolf portado a la API array de numpy/cupy: el mismo
+    código corre en CPU (xp=numpy) o GPU (xp=cupy), donde el gemm K×K
+    domina y los tensor cores pagan el costo para universos grandes.
+    """
+    X = xp.asarray(values, dtype=xp.float64)
+    n, p = X.shape
+    X = X - X.mean(axis=0)
+
+    emp = X.T @ X / n
+    mu = xp.trace(emp) / p
+
+    # d2 = ||emp - mu*I||_F^2 ; b2 usa Σ||x_k||^4 - n*||emp||_F^2 (forma cerrada)
+    d2 = xp.sum((emp - mu * xp.eye(p)) ** 2)
+    row_norms2 = xp.sum(X * X, axis=1)
+    b2 = (xp.sum(row_norms2 ** 2) - n * xp.sum(emp * emp)) / (n ** 2)
+
+    shrinkage = float(xp.minimum(b2, d2) / d2) if float(d2) > 0 else 0.0
+    cov = (1.0 - shrinkage) * emp + shrinkage * mu * xp.eye(p)
+    return cov
+
+
 def _safe_covariance(returns: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
     """
     Construye matriz de covarianza anualizada y la sanea.
+
+    Por defecto usa shrinkage Ledoit-Wolf (sklearn) sobre los retornos:
+    entrega una matriz PSD bien condicionada en una pasada analítica, lo
+    que evita los retries/fallbacks del solver cuando n_assets se acerca
+    a n_days. cov_method permite "sample" (muestral + jitter), "ledoit_wolf"
+    o "rblw"/"oas" (Oracle Approximating Shrinkage).
     """
     trading_days = int(cfg.get("evaluation", {}).get("trading_days", 252))
+    ocfg = cfg.get("optimization", {})
+    method = str(ocfg.get("cov_method", "ledoit_wolf")).lower()
 
-    # Covarianza diaria
+    # GPU opcional: para universos grandes (K~500+) el costo de LW son
+    # dos productos K×K; con device "gpu" se despacha a CuPy.
+    if method == "ledoit_wolf" and str(ocfg.get("device", "cpu")).lower() == "gpu":
+        try:
+            import cupy
+            cov_np = cupy.asnumpy(_ledoit_wolf_cov_xp(returns.fillna(0.0).values, cupy))
+            cov = pd.DataFrame(cov_np, index=returns.columns, columns=returns.columns)
+            return cov * trading_days
+        except ImportError:
+            pass  # sin cupy: continuar con el camino CPU (sklearn)
+
+    cov = None
+    if method in ("ledoit_wolf", "oas", "rblw"):
+        try:
+            from sklearn.covariance import LedoitWolf, OAS
+            est = OAS() if method in ("oas", "rblw") else LedoitWolf()
+            est.fit(returns.fillna(0.0).values)
+            cov = pd.DataFrame(est.covariance_, index=returns.columns, columns=returns.columns)
+            # Shrinkage ya entrega PSD bien condicionada: no necesita jitter
+            return cov * trading_days
+        except ImportError:
+            cov = None  # sklearn no disponible: caer a covarianza muestral
+
+    # Covarianza diaria muestral
     cov = returns.cov()
 
     # Reemplazar NaN/Inf
@@ -105,7 +156,6 @@ def _safe_covariance(returns: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame
     cov_annual = cov * trading_days
 
     # Regularización (jitter) para PSD / mal condicionamiento
-    ocfg = cfg.get("optimization", {})
     jitter = float(ocfg.get("cov_jitter", 1e-6))
     if jitter > 0:
         cov_annual = cov_annual + np.eye(len(cov_annual)) * jitter
@@ -113,37 +163,65 @@ def _safe_covariance(returns: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame
     return cov_annual
 
 
+def _curve_from_returns(port_ret: np.ndarray, index: pd.Index, name: str) -> pd.Series:
+    """
+    Curva de valor desde retornos diarios: add + cumprod in-place sobre un
+    solo buffer y base fijada antes de envolver en Series (sin el scalar
+    .iloc[0] de la cadena pandas).
+    """
+    out = np.empty(len(port_ret), dtype=np.float64)
+    np.add(port_ret, 1.0, out=out)
+    np.cumprod(out, out=out)
+    out[0] = 1.0
+    return pd.Series(out, index=index, name=name)
+
+
+def _equal_weight_curve(R: pd.DataFrame) -> pd.Series:
+    """
+    Curva Equal-Weight para fallbacks. Con w = 1/K, (R*w).sum(axis=1)
+    equivale a R.mean(axis=1): evita el broadcast N×K intermedio.
+    """
+    return _curve_from_returns(R.mean(axis=1).to_numpy(), R.index, "EW")
+
+
 def _monthly_rebalance_curve(prices: pd.DataFrame, weights: pd.Series) -> pd.Series:
     """
     Curva de valor con rebalance mensual (simple):
     - Rebalance en inicio de cada mes a los pesos.
     - Entre rebalanceos, Buy&Hold por drift.
+
+    Implementación vectorizada: entre rebalanceos el drift equivale a
+    Buy&Hold, así que el valor dentro de cada segmento es
+    val_inicio * (w @ cumprod(1+R_seg)). Se computa un cumprod numpy por
+    segmento en vez de iterar fila a fila con iterrows.
+
+    Nota: la renormalización diaria del loop original (w*(1+r) / sum) tiene
+    denominador exacto 1 + w·r (el propio retorno del portafolio); esa
+    identidad analítica es la que hace que el cumprod por segmento sea
+    exactamente equivalente, sin reducción sum() por día.
     """
-    px = prices.copy().sort_index()
+    px = prices.sort_index()
     rets = px.pct_change().fillna(0.0)
+    rets_np = rets.to_numpy()
+    n = len(rets_np)
 
-    w = weights.values.astype(float)
+    w = weights.to_numpy(dtype=float)
     w = w / w.sum() if w.sum() != 0 else np.ones_like(w) / len(w)
 
-    vals = []
-    current_w = w.copy()
-    val = 1.0
-
-    for dt, r in rets.iterrows():
-        vals.append(val)
-
-        # Retorno del portafolio
-        pr = float(np.dot(current_w, r.values))
-        val *= (1.0 + pr)
+    # Límites de segmento: el rebalance ocurre tras procesar cada inicio
+    # de mes (misma semántica que el loop original).
+    starts = np.flatnonzero(rets.index.is_month_start) + 1
+    bounds = np.unique(np.r_[0, starts[starts < n], n])
 
-        # Drift weights
-        current_w = current_w * (1.0 + r.values)
-        s = current_w.sum()
-        current_w = current_w / s if s != 0 else w.copy()
-
-        # Rebalance mensual al inicio del mes
-        if getattr(dt, "is_month_start", False):
-            current_w = w.copy()
+    vals = np.empty(n, dtype=np.float64)
+    val = 1.0
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        # Valor relativo del segmento tras procesar cada día (drift BH)
+        growth = np.cumprod(1.0 + rets_np[s:e], axis=0) @ w
+        vals[s] = val
+        if e - s > 1:
+            vals[s + 1:e] = val * growth[:-1]
+        val *= growth[-1]
 
     curve = pd.Series(vals, index=rets.index, name="MVO")
     curve.iloc[0] = 1.0
@@ -154,6 +232,7 @@ def run_mvo_optimization(
     returns: pd.DataFrame,
     forecast_outputs: Dict[str, Any],
     cfg: Dict[str, Any],
+    returns_stats: Dict[str, pd.Series] = None,
 ) -> Dict[str, Any]:
     ocfg = cfg.get("optimization", {})
     enabled = bool(ocfg.get("enabled", True))
@@ -187,20 +266,16 @@ def run_mvo_optimization(
         notes.append(f"Se eliminaron activos por NaN/Inf en retornos: {dropped}")
 
     # 2) Construir mu y cov robustos
-    mu = _make_mu_vector(R, forecast_outputs, cfg)
+    mu = _make_mu_vector(R, forecast_outputs, cfg, returns_stats=returns_stats)
     cov = _safe_covariance(R, cfg)
 
     # Validación final: nada NaN/Inf
     if (not np.isfinite(mu.values).all()) or (not np.isfinite(cov.values).all()):
         notes.append("Se detectaron NaN/Inf en mu/cov tras saneo. Aplicando fallback Equal-Weight.")
         w = pd.Series(np.ones(R.shape[1]) / R.shape[1], index=R.columns)
-        # curva usando returns (sin precios) -> aproximación: cumprod(1+ret)
-        port_ret = (R * w).sum(axis=1)
-        curve = (1.0 + port_ret).cumprod()
-        curve.iloc[0] = 1.0
         models["EW_Fallback"] = {
             "weights": w,
-            "curve": curve,
+            "curve": _equal_weight_curve(R),
             "description": "Fallback Equal-Weight por datos inválidos en optimización.",
         }
         return {"status": "ok", "models": models, "notes": notes}
@@ -219,11 +294,12 @@ def run_mvo_optimization(
     try:
         ef = EfficientFrontier(mu, cov, weight_bounds=(lb, ub))
 
-        # Límites por activo (opcional)
+        # Límites por activo (opcional): una sola restricción vectorial,
+        # CVXPY la difunde elementwise (1 nodo en el DAG en vez de K).
         max_w = ocfg.get("max_weight", None)
         if max_w is not None:
-            for t in mu.index:
-                ef.add_constraint(lambda w, i=list(mu.index).index(t): w[i] <= float(max_w))
+            mw = float(max_w)
+            ef.add_constraint(lambda w: w <= mw)
 
         # Objetivo principal: max Sharpe
         weights = ef.max_sharpe(risk_free_rate=rf)
@@ -235,10 +311,9 @@ def run_mvo_optimization(
         # Curva: con precios en cfg/data, podriamos reconstruir.
         # Aquí usamos returns para curva diaria (equivalente a rebalance mensual en returns no aplica).
         # Para mantener coherencia, reconstruimos curva diaria sin rebalance con w fijo.
-        port_ret = (R * w).sum(axis=1)
-        curve = (1.0 + port_ret).cumprod()
-        curve.iloc[0] = 1.0
-        curve.name = "MVO_MaxSharpe"
+        # gemv BLAS en vez de (R * w).sum(axis=1): sin intermedio N×K.
+        port_ret_arr = R.to_numpy() @ w.to_numpy()
+        curve = _curve_from_returns(port_ret_arr, R.index, "MVO_MaxSharpe")
 
         models["MVO_MaxSharpe"] = {
             "weights": w,
@@ -257,10 +332,8 @@ def run_mvo_optimization(
             if w.sum() != 0:
                 w = w / w.sum()
 
-            port_ret = (R * w).sum(axis=1)
-            curve = (1.0 + port_ret).cumprod()
-            curve.iloc[0] = 1.0
-            curve.name = "MVO_MinVol"
+            port_ret_arr = R.to_numpy() @ w.to_numpy()
+            curve = _curve_from_returns(port_ret_arr, R.index, "MVO_MinVol")
 
             models["MVO_MinVol"] = {
                 "weights": w,
@@ -270,12 +343,9 @@ def run_mvo_optimization(
         except Exception as e2:
             notes.append(f"Falló min_volatility también: {repr(e2)}. Usando Equal-Weight.")
             w = pd.Series(np.ones(R.shape[1]) / R.shape[1], index=R.columns)
-            port_ret = (R * w).sum(axis=1)
-            curve = (1.0 + port_ret).cumprod()
-            curve.iloc[0] = 1.0
             models["EW_Fallback"] = {
                 "weights": w,
-                "curve": curve,
+                "curve": _equal_weight_curve(R),
                 "description": "Fallback Equal-Weight por fallo total del optimizador.",
             }
 
@@ -5,6 +5,11 @@ from typing import Dict, Any, List
 import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 def preprocess_prices(prices: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
     """
@@ -16,12 +21,13 @@ def preprocess_prices(prices: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame
     """
     pcfg = cfg.get("preprocessing", {})
 
-    df = prices.copy()
-    df = df.sort_index()
-    df = df.dropna(axis=1, how="all")
+    # Sin .copy() inicial: dropna(axis=1) ya retorna un frame nuevo, y el
+    # sort solo se paga si el índice viene desordenado. Ahorra dos memcpy
+    # completos del frame por llamada.
+    df = prices if prices.index.is_monotonic_increasing else prices.sort_index()
 
-    # forward-fill para alinear días faltantes
-    df = df.ffill()
+    # dropna de columnas vacías + forward-fill para alinear días faltantes
+    df = df.dropna(axis=1, how="all").ffill()
 
     # opcional: eliminar filas con NaN restantes
     drop_any = bool(pcfg.get("drop_any_nan_rows", True))
@@ -35,25 +41,65 @@ def compute_returns(prices: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
     rcfg = cfg.get("returns", {})
     method = str(rcfg.get("method", "simple")).lower()
 
+    # Kernel numpy directo sobre el buffer: una sola asignación de salida
+    # en vez de la cadena pandas (log/pct_change + diff + fillna + replace)
+    # que materializa 3-4 intermedios.
+    vals = prices.to_numpy(dtype=np.float64)
+    out = np.empty_like(vals)
+    out[0] = 0.0
+
     if method == "log":
-        rets = np.log(prices).diff().fillna(0.0)
+        logv = np.log(vals)
+        np.subtract(logv[1:], logv[:-1], out=out[1:])
     else:
-        rets = prices.pct_change().fillna(0.0)
+        np.divide(vals[1:] - vals[:-1], vals[:-1], out=out[1:])
+
+    # NaN/Inf (precios 0 o faltantes) -> 0.0, in place
+    np.nan_to_num(out, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return pd.DataFrame(out, index=prices.index, columns=prices.columns)
+
+
+def _sma(df: pd.DataFrame, w: int) -> pd.DataFrame:
+    return df.rolling(w).mean()
+
 
-    rets = rets.replace([np.inf, -np.inf], np.nan).fillna(0.0)
-    return rets
+def _ema(df: pd.DataFrame, w: int) -> pd.DataFrame:
+    return df.ewm(span=w, adjust=False).mean()
 
 
-def _sma(s: pd.Series, w: int) -> pd.Series:
-    return s.rolling(w).mean()
+def _rsi_kernel(x: np.ndarray, w: int) -> np.ndarray:
+    # Una sola pasada por columna: delta, gain, loss y sumas rodantes se
+    # mantienen en registros, sin materializar los intermedios de la
+    # cadena diff/clip/rolling de pandas (~4x menos tráfico de memoria).
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    for j in range(m):
+        gain = 0.0
+        loss = 0.0
+        for i in range(1, n):
+            d = x[i, j] - x[i - 1, j]
+            gain += d if d > 0.0 else 0.0
+            loss += -d if d < 0.0 else 0.0
+            if i > w:
+                dp = x[i - w, j] - x[i - w - 1, j]
+                gain -= dp if dp > 0.0 else 0.0
+                loss -= -dp if dp < 0.0 else 0.0
+            if i >= w and loss > 0.0:
+                out[i, j] = 100.0 - 100.0 / (1.0 + gain / loss)
+    return out
 
 
-def _ema(s: pd.Series, w: int) -> pd.Series:
-    return s.ewm(span=w, adjust=False).mean()
+if njit is not None:
+    _rsi_kernel = njit(cache=True, fastmath=True)(_rsi_kernel)
 
 
-def _rsi(s: pd.Series, w: int) -> pd.Series:
-    delta = s.diff()
+def _rsi(df: pd.DataFrame, w: int) -> pd.DataFrame:
+    if njit is not None:
+        vals = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+        return pd.DataFrame(_rsi_kernel(vals, w), index=df.index, columns=df.columns)
+
+    # Sin numba el scan escalar sería más lento: fallback pandas vectorizado
+    delta = df.diff()
     gain = delta.clip(lower=0.0).rolling(w).mean()
     loss = (-delta.clip(upper=0.0)).rolling(w).mean()
     rs = gain / loss.replace(0.0, np.nan)
@@ -61,32 +107,51 @@ def _rsi(s: pd.Series, w: int) -> pd.Series:
     return rsi
 
 
-def _bollinger(s: pd.Series, w: int, k: float):
-    mid = s.rolling(w).mean()
-    std = s.rolling(w).std(ddof=0)
+def _bollinger(df: pd.DataFrame, w: int, k: float) -> Dict[str, pd.DataFrame]:
+    # Un solo objeto rolling para mid y std; las 4 bandas salen por
+    # aritmética vectorizada y se entregan juntas para concatenar en batch.
+    roll = df.rolling(w)
+    mid = roll.mean()
+    std = roll.std(ddof=0)
     upper = mid + k * std
     lower = mid - k * std
     bandwidth = (upper - lower) / mid.replace(0.0, np.nan)
-    return upper, mid, lower, bandwidth
+    return {"upper": upper, "mid": mid, "lower": lower, "bw": bandwidth}
 
 
 def build_features(
     prices: pd.DataFrame,
     returns: pd.DataFrame,
-    cfg: Dict[str, Any]
+    cfg: Dict[str, Any],
+    returns_stats: Dict[str, pd.Series] = None
 ) -> pd.DataFrame:
     """
     Construye features por activo y las concatena en un solo DataFrame.
+
+    Cada indicador se computa para TODOS los activos a la vez (rolling/ewm
+    sobre el DataFrame completo) y los frames resultantes se concatenan en
+    una sola pasada — amortiza el dispatch pandas y evita insertar columnas
+    una por una (cada inserción re-copia el BlockManager).
+
     Compatible con dos esquemas de config:
     - Nuevo: features.bollinger_window, features.bollinger_k
     - Legacy: features.bb_window, features.bb_k
+
+    returns_stats permite inyectar reducciones ya computadas por el
+    orquestador ("mean_row" = returns.mean(axis=1)) y ahorrarse una
+    pasada completa sobre la matriz de retornos.
     """
     fcfg = cfg.get("features", {})
+    stats = returns_stats or {}
+    mean_row = stats.get("mean_row")
+    if mean_row is None:
+        mean_row = returns.mean(axis=1)
+
     enabled = bool(fcfg.get("enabled", True))
     if not enabled:
         # Si no hay features, devolvemos al menos retornos agregados
         out = pd.DataFrame(index=prices.index)
-        out["port_ret_eq"] = returns.mean(axis=1)
+        out["port_ret_eq"] = mean_row
         return out
 
     sma_windows: List[int] = [int(x) for x in fcfg.get("sma_windows", [10, 20, 50])]
@@ -106,38 +171,41 @@ def build_features(
 
     vol_window: int = int(fcfg.get("volatility_window", 20))
 
-    feats = pd.DataFrame(index=prices.index)
+    px = prices.astype(float)
+    cols = list(px.columns)
+    frames: List[pd.DataFrame] = []
 
-    for col in prices.columns:
-        s = prices[col].astype(float)
+    def _suffixed(df: pd.DataFrame, suffix: str) -> pd.DataFrame:
+        df.columns = [f"{c}_{suffix}" for c in cols]
+        return df
 
-        # Precios y retornos
-        feats[f"{col}_close"] = s
-        feats[f"{col}_ret"] = returns[col].astype(float)
+    # Precios y retornos
+    frames.append(_suffixed(px.copy(), "close"))
+    frames.append(_suffixed(returns[cols].astype(float), "ret"))
 
-        # SMA
-        for w in sma_windows:
-            feats[f"{col}_sma_{w}"] = _sma(s, w)
+    # SMA
+    for w in sma_windows:
+        frames.append(_suffixed(_sma(px, w), f"sma_{w}"))
 
-        # EMA
-        for w in ema_windows:
-            feats[f"{col}_ema_{w}"] = _ema(s, w)
+    # EMA
+    for w in ema_windows:
+        frames.append(_suffixed(_ema(px, w), f"ema_{w}"))
 
-        # RSI
-        feats[f"{col}_rsi_{rsi_window}"] = _rsi(s, rsi_window)
+    # RSI
+    frames.append(_suffixed(_rsi(px, rsi_window), f"rsi_{rsi_window}"))
 
-        # Bollinger
-        up, mid, low, bw = _bollinger(s, bb_w, bb_k)
-        feats[f"{col}_bb_upper_{bb_w}"] = up
-        feats[f"{col}_bb_mid_{bb_w}"] = mid
-        feats[f"{col}_bb_lower_{bb_w}"] = low
-        feats[f"{col}_bb_bw_{bb_w}"] = bw
+    # Bollinger
+    for part, frame in _bollinger(px, bb_w, bb_k).items():
+        frames.append(_suffixed(frame, f"bb_{part}_{bb_w}"))
 
-        # Volatilidad rodante
-        feats[f"{col}_vol_{vol_window}"] = returns[col].rolling(vol_window).std(ddof=0)
+    # Volatilidad rodante
+    frames.append(_suffixed(returns[cols].rolling(vol_window).std(ddof=0), f"vol_{vol_window}"))
 
     # Feature global: retorno EW del portafolio (baseline de señal)
-    feats["port_ret_eq"] = returns.mean(axis=1)
+    frames.append(pd.DataFrame({"port_ret_eq": mean_row}))
+
+    # Una sola concatenación de todos los frames de indicadores
+    feats = pd.concat(frames, axis=1, copy=False)
 
     # Limpieza final: NaN por ventanas
     feats = feats.replace([np.inf, -np.inf], np.nan)
@@ -52,10 +52,23 @@ def run_rl_ppo(features: pd.DataFrame, prices: pd.DataFrame, cfg: Dict[str, Any]
             self.obs_dim = X.shape[1] + 2
             self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(self.obs_dim,), dtype=np.float32)
 
+            # Features pre-convertidas a ndarray float32 + buffer de obs
+            # preallocado: el _obs por step es copia de fila C en vez de
+            # iloc + astype + concatenate de pandas (~100k llamadas).
+            self._X = X.to_numpy(dtype=np.float32, copy=True)
+            self._buf = np.empty(self.obs_dim, dtype=np.float32)
+
             self.balance = 1.0
             self.position = 0.0  # fracción invertida
 
-            self.returns = self.px.pct_change().fillna(0.0).values
+            # Retornos como float32 vía división cruda (sin la cadena
+            # pct_change/fillna de pandas): mitad de bytes por step y
+            # mismo dtype que usa la policy de SB3 internamente.
+            p = self.px.to_numpy(dtype=np.float32)
+            r = np.empty_like(p)
+            r[0] = 0.0
+            np.divide(p[1:] - p[:-1], p[:-1], out=r[1:])
+            self.returns = r
 
         def reset(self, seed=None, options=None):
             super().reset(seed=seed)
@@ -65,8 +78,11 @@ def run_rl_ppo(features: pd.DataFrame, prices: pd.DataFrame, cfg: Dict[str, Any]
             return self._obs(), {}
 
         def _obs(self):
-            x = self.X.iloc[self.t].values.astype(np.float32)
-            return np.concatenate([x, np.array([self.balance, self.position], dtype=np.float32)])
+            self._buf[:-2] = self._X[self.t]
+            self._buf[-2] = self.balance
+            self._buf[-1] = self.position
+            # Copia defensiva: SB3 puede retener la obs por referencia
+            return self._buf.copy()
 
         def step(self, action):
             a = float(np.clip(action[0], -1.0, 1.0))
@@ -95,14 +111,31 @@ def run_rl_ppo(features: pd.DataFrame, prices: pd.DataFrame, cfg: Dict[str, Any]
     model = PPO("MlpPolicy", env, verbose=0)
     model.learn(total_timesteps=int(rl_cfg.get("timesteps", 100000)))
 
-    # Backtest simple: reconstruir curva
+    # Backtest simple: reconstruir curva. El rollout es closed-loop (la
+    # obs depende de acciones pasadas), así que no se puede batchear; en
+    # cambio se llama la policy directo bajo no_grad con un tensor
+    # reutilizado en device, evitando el wrapping numpy<->torch que
+    # model.predict paga en cada step.
     obs, _ = env.reset()
     vals = [1.0]
     done = False
-    while not done:
-        action, _ = model.predict(obs, deterministic=True)
-        obs, reward, done, _, _ = env.step(action)
-        vals.append(env.balance)
+    try:
+        import torch
+
+        policy = model.policy
+        obs_t = torch.empty((1, env.obs_dim), dtype=torch.float32, device=policy.device)
+        with torch.no_grad():
+            while not done:
+                obs_t.copy_(torch.from_numpy(obs[None, :]))
+                action = policy._predict(obs_t, deterministic=True).cpu().numpy()[0]
+                obs, reward, done, _, _ = env.step(action)
+                vals.append(env.balance)
+    except Exception:
+        # Fallback al camino estándar de SB3
+        while not done:
+            action, _ = model.predict(obs, deterministic=True)
+            obs, reward, done, _, _ = env.step(action)
+            vals.append(env.balance)
 
     curve = pd.Series(vals, index=[X.index[0]] + list(X.index[:len(vals)-1]), name="PPO")
 
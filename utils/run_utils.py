@@ -1,7 +1,9 @@
 # utils/run_utils.py
 from __future__ import annotations
 
+import atexit
 import csv
+import functools
 import json
 import os
 import re
@@ -9,6 +11,11 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 @dataclass(frozen=True)
 class RunMeta:
@@ -19,32 +26,51 @@ class RunMeta:
     tables_dir: str
 
 
+# Patrones precompilados: evita el lookup del cache de re en cada llamada
+_WS_RE = re.compile(r"\s+")
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
 def safe_slug(s: str, max_len: int = 48) -> str:
     s = (s or "").strip()
-    s = re.sub(r"\s+", "-", s)
-    s = re.sub(r"[^A-Za-z0-9._-]+", "", s)
+    s = _WS_RE.sub("-", s)
+    s = _UNSAFE_RE.sub("", s)
     s = s.strip("-_.")
     return s[:max_len]
 
 
-def derive_run_tag(cfg: Dict[str, Any]) -> str:
+@functools.lru_cache(maxsize=256)
+def _derive_tag_impl(tag: str, tickers: tuple, start: str, end: str) -> str:
     # 1) tag explícito en cfg.run.tag
-    tag = ""
-    run_cfg = cfg.get("run")
-    if isinstance(run_cfg, dict):
-        tag = run_cfg.get("tag", "") or ""
     tag = safe_slug(tag, max_len=60)
     if tag:
         return tag
 
     # 2) fallback: tickers + rango temporal
+    tickers_part = safe_slug("_".join(tickers[:4]), max_len=40) or "run"
+    start = safe_slug(start, max_len=12)
+    end = safe_slug(end, max_len=12)
+    return safe_slug(f"{tickers_part}_{start}_{end}", max_len=60)
+
+
+def derive_run_tag(cfg: Dict[str, Any]) -> str:
+    # Canonicaliza a tipos hashables y memoiza: dentro de un mismo run el
+    # tag se deriva varias veces con los mismos insumos (slugs + joins).
+    tag = ""
+    run_cfg = cfg.get("run")
+    if isinstance(run_cfg, dict):
+        tag = run_cfg.get("tag", "") or ""
+
     tickers = cfg.get("data", {}).get("tickers", [])
     if isinstance(tickers, str):
         tickers = [tickers]
-    tickers_part = safe_slug("_".join(list(tickers)[:4]), max_len=40) or "run"
-    start = safe_slug(str(cfg.get("data", {}).get("start_date", "")), max_len=12)
-    end = safe_slug(str(cfg.get("data", {}).get("end_date", "")), max_len=12)
-    return safe_slug(f"{tickers_part}_{start}_{end}", max_len=60)
+
+    return _derive_tag_impl(
+        str(tag),
+        tuple(str(t) for t in tickers),
+        str(cfg.get("data", {}).get("start_date", "")),
+        str(cfg.get("data", {}).get("end_date", "")),
+    )
 
 
 def apply_timestamped_outputs(cfg: Dict[str, Any]) -> RunMeta:
@@ -100,6 +126,25 @@ def _as_list(x) -> List[str]:
     return [str(x)]
 
 
+# Handles persistentes (append, buffer 64KB) para los índices de runs:
+# en modo batch (grid search / walk-forward) se abre cada archivo UNA vez
+# por proceso en vez de open/close por fila.
+_RUN_INDEX_FILES: Dict[str, Any] = {}
+
+# Flag de header ya escrito: se resuelve una vez por proceso, las filas
+# siguientes no vuelven a consultar la posición del archivo.
+_CSV_HEADER_WRITTEN = False
+
+
+def _get_index_file(path: str):
+    f = _RUN_INDEX_FILES.get(path)
+    if f is None or f.closed:
+        f = open(path, "a", buffering=65536, newline="", encoding="utf-8")
+        atexit.register(f.close)
+        _RUN_INDEX_FILES[path] = f
+    return f
+
+
 def append_run_index(meta: RunMeta, cfg: Dict[str, Any], report_path: str) -> None:
     """
     Registra los datos de cada proceso en:
@@ -122,13 +167,20 @@ def append_run_index(meta: RunMeta, cfg: Dict[str, Any], report_path: str) -> No
     }
 
     csv_path = "runs_index.csv"
-    write_header = not os.path.exists(csv_path)
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(row.keys()))
-        if write_header:
-            w.writeheader()
-        w.writerow(row)
+    f = _get_index_file(csv_path)
+    w = csv.writer(f)
+
+    global _CSV_HEADER_WRITTEN
+    if not _CSV_HEADER_WRITTEN:
+        if f.tell() == 0:
+            w.writerow(list(row.keys()))
+        _CSV_HEADER_WRITTEN = True
+
+    w.writerow(list(row.values()))
 
     jsonl_path = "runs_index.jsonl"
-    with open(jsonl_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    jf = _get_index_file(jsonl_path)
+    if orjson is not None:
+        jf.write(orjson.dumps(row).decode("utf-8") + "\n")
+    else:
+        jf.write(json.dumps(row, ensure_ascii=False) + "\n")